@@ -6,15 +6,26 @@ Affichage Terminal + Serveur Web + Base de données SQLite
 
 import sqlite3
 import time
+import queue
 import json
 from datetime import datetime, timedelta
+import threading
 from threading import Thread, Lock
-from flask import Flask, jsonify, send_from_directory
+from flask import Flask, Response, jsonify, request, send_from_directory
 import os
+import urllib.parse
 from collections import deque
-from dataclasses import dataclass, asdict
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional
 import math
+import struct
+import gzip
+import hashlib
+import logging
+import sys
+import argparse
+
+logger = logging.getLogger(__name__)
 
 # Import pour DHT22 sur Raspberry Pi 4
 try:
@@ -28,32 +39,58 @@ except ImportError:
 
 # Import pour PZEM-004T (communication ModBus RTU via USB/RS485)
 try:
-    from pymodbus.client import ModbusSerialClient
+    import serial
     PZEM_DISPONIBLE = True
-    print("✅ Bibliothèque pymodbus chargée")
+    print("✅ Bibliothèque pyserial chargée")
 except ImportError:
-    print("⚠️  pymodbus non installé - Mode simulation PZEM-004T")
+    print("⚠️  pyserial non installé - Mode simulation PZEM-004T")
     PZEM_DISPONIBLE = False
 
+# Import pour la sérialisation JSON rapide des réponses de l'API
+try:
+    import orjson
+    ORJSON_DISPONIBLE = True
+    print("✅ Bibliothèque orjson chargée")
+except ImportError:
+    print("⚠️  orjson non installé - Sérialisation JSON standard")
+    ORJSON_DISPONIBLE = False
+
+
+# Import pour le serveur WSGI de production (multi-threads)
+try:
+    from waitress import serve
+    WAITRESS_DISPONIBLE = True
+    print("✅ Bibliothèque waitress chargée")
+except ImportError:
+    print("⚠️  waitress non installé - Serveur de développement Flask")
+    WAITRESS_DISPONIBLE = False
+
+
+def json_bytes(donnees) -> bytes:
+    """Sérialise en JSON (orjson si disponible, sinon module json)"""
+    if ORJSON_DISPONIBLE:
+        return orjson.dumps(donnees)
+    return json.dumps(donnees).encode()
+
 
 # ============================================================================
 # MODÈLE DE DONNÉES
 # ============================================================================
 
-@dataclass
-class MesureEnvironnement:
+# Tuples nommés (pas de copie via asdict): l'ordre des champs est celui des
+# colonnes SQL, le tuple sert donc directement de paramètres d'INSERT
+class MesureEnvironnement(NamedTuple):
     """Mesure DHT22: température et humidité"""
-    timestamp: str
+    timestamp: int          # epoch (secondes)
     temperature: float
     humidite: float
     point_rosee: float
     indice_chaleur: float
 
 
-@dataclass
-class MesureElectrique:
+class MesureElectrique(NamedTuple):
     """Mesure PZEM-004T: paramètres électriques"""
-    timestamp: str
+    timestamp: int          # epoch (secondes)
     tension: float          # Volts
     courant: float          # Ampères
     puissance: float        # Watts
@@ -62,6 +99,100 @@ class MesureElectrique:
     facteur_puissance: float  # 0-1
 
 
+# ============================================================================
+# TAMPON DES DERNIÈRES MESURES
+# ============================================================================
+
+class TamponCirculaire:
+    """Tampon circulaire de taille fixe: un seul écrivain, lecteurs sans verrou"""
+    
+    def __init__(self, taille: int = 100):
+        self.taille = taille
+        self._cases = [None] * taille
+        self._index = 0     # nombre total d'éléments écrits
+    
+    def ajouter(self, element):
+        """Écrit un élément (réservé au thread de mesure)"""
+        i = self._index
+        self._cases[i % self.taille] = element
+        # Publié après l'écriture de la case: l'affectation d'un int est atomique sous le GIL
+        self._index = i + 1
+    
+    def elements(self) -> list:
+        """Copie des éléments, du plus ancien au plus récent"""
+        i = self._index
+        n = min(i, self.taille)
+        cases = self._cases
+        return [cases[(i - n + k) % self.taille] for k in range(n)]
+
+
+# ============================================================================
+# STATISTIQUES GLISSANTES
+# ============================================================================
+
+class FenetreGlissante:
+    """Nombre, somme, min et max de plusieurs séries sur une fenêtre de temps glissante"""
+    
+    def __init__(self, duree: float, nb_valeurs: int):
+        self.duree = duree                  # secondes
+        self.echantillons = deque()         # (instant epoch, valeurs)
+        self.sommes = [0.0] * nb_valeurs
+        # Files monotones: le min (resp. max) de la fenêtre est toujours en tête
+        self._mins = [deque() for _ in range(nb_valeurs)]
+        self._maxs = [deque() for _ in range(nb_valeurs)]
+    
+    def ajouter(self, instant: float, valeurs: tuple):
+        """Ajoute un échantillon (instants croissants) et retire ceux expirés"""
+        self.echantillons.append((instant, valeurs))
+        for i, valeur in enumerate(valeurs):
+            self.sommes[i] += valeur
+            
+            mins = self._mins[i]
+            while mins and mins[-1][1] >= valeur:
+                mins.pop()
+            mins.append((instant, valeur))
+            
+            maxs = self._maxs[i]
+            while maxs and maxs[-1][1] <= valeur:
+                maxs.pop()
+            maxs.append((instant, valeur))
+        
+        self.purger(instant)
+    
+    def purger(self, maintenant: float):
+        """Retire les échantillons sortis de la fenêtre"""
+        limite = maintenant - self.duree
+        echantillons = self.echantillons
+        while echantillons and echantillons[0][0] <= limite:
+            _, valeurs = echantillons.popleft()
+            for i, valeur in enumerate(valeurs):
+                self.sommes[i] -= valeur
+        
+        for file in self._mins + self._maxs:
+            while file and file[0][0] <= limite:
+                file.popleft()
+        
+        if not echantillons:
+            # Repartir de zéro évite l'accumulation d'erreurs d'arrondi
+            self.sommes = [0.0] * len(self.sommes)
+    
+    @property
+    def nombre(self) -> int:
+        return len(self.echantillons)
+    
+    def somme(self, i: int) -> Optional[float]:
+        return self.sommes[i] if self.echantillons else None
+    
+    def moyenne(self, i: int) -> Optional[float]:
+        return self.sommes[i] / len(self.echantillons) if self.echantillons else None
+    
+    def minimum(self, i: int) -> Optional[float]:
+        return self._mins[i][0][1] if self._mins[i] else None
+    
+    def maximum(self, i: int) -> Optional[float]:
+        return self._maxs[i][0][1] if self._maxs[i] else None
+
+
 # ============================================================================
 # GESTIONNAIRE DE BASE DE DONNÉES
 # ============================================================================
@@ -69,22 +200,147 @@ class MesureElectrique:
 class DatabaseManager:
     """Gestion de la base de données SQLite avec création automatique"""
     
+    # Écriture par lots: une transaction pour TAILLE_LOT mesures au plus,
+    # ou toutes les DELAI_LOT secondes
+    TAILLE_LOT = 500
+    DELAI_LOT = 2.0
+    
+    # Entretien périodique par le thread écrivain: checkpoint du WAL (taille
+    # du fichier -wal bornée) et ANALYZE (plans de requêtes à jour)
+    INTERVALLE_CHECKPOINT = 300         # secondes
+    LIGNES_AVANT_ANALYZE = 100_000
+    
+    # Agrégats par minute (statistiques longues) et rétention des mesures brutes
+    INTERVALLE_AGREGATION = 60          # secondes
+    RETENTION_JOURS = 30
+    
+    # Requêtes d'insertion, préparées une fois puis réutilisées depuis le
+    # cache de requêtes de la connexion d'écriture
+    SQL_INSERT_ENV = """
+        INSERT INTO mesures_environnement 
+        (timestamp, temperature, humidite, point_rosee, indice_chaleur)
+        VALUES (?, ?, ?, ?, ?)
+    """
+    SQL_INSERT_ELEC = """
+        INSERT INTO mesures_electriques 
+        (timestamp, tension, courant, puissance, energie, frequence, facteur_puissance)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """
+    
+    # Réglages SQLite adaptés à la carte SD: WAL + synchronous=NORMAL
+    # (un seul fsync par checkpoint) et cache/mmap en mémoire
+    PRAGMAS_ECRITURE = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA wal_autocheckpoint=1000",
+    )
+    PRAGMAS_CONNEXION = (
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA mmap_size=67108864",
+        "PRAGMA cache_size=-20000",
+    )
+    
+    # Périodes (heures) dont les statistiques sont tenues à jour en mémoire
+    # (les périodes plus longues sont lues dans les agrégats par minute)
+    PERIODES_GLISSANTES = (24,)
+    
     def __init__(self, db_path: str = "surveillance.db"):
         self.db_path = db_path
-        self.lock = Lock()
         self._creer_tables()
+        
+        # Statistiques glissantes: heures -> (fenêtre environnement, fenêtre électrique)
+        self._fenetres = {
+            heures: (FenetreGlissante(heures * 3600, 2), FenetreGlissante(heures * 3600, 6))
+            for heures in self.PERIODES_GLISSANTES
+        }
+        self._lock_stats = Lock()
+        
+        # Connexion d'écriture unique, utilisée uniquement par le thread écrivain
+        self._conn_ecriture = self._connecter(check_same_thread=False, cached_statements=32)
+        self._write_queue = queue.Queue()
+        self._dernier_checkpoint = time.monotonic()
+        self._derniere_agregation = time.monotonic() - self.INTERVALLE_AGREGATION
+        self._lignes_depuis_analyze = 0
+        self._thread_ecriture = Thread(target=self._writer_loop, daemon=True)
+        self._thread_ecriture.start()
+        
+        # Une connexion en lecture seule par thread (threads Flask)
+        self._tls = threading.local()
+        self._charger_fenetres()
         print(f"✅ Base de données initialisée: {db_path}")
     
+    def _connecter(self, lecture_seule: bool = False, **kwargs) -> sqlite3.Connection:
+        """Ouvre une connexion SQLite avec les PRAGMAs du projet"""
+        if lecture_seule:
+            # Connexion en lecture seule: les requêtes du dashboard ne
+            # peuvent jamais bloquer le thread écrivain
+            uri = f"file:{urllib.parse.quote(os.path.abspath(self.db_path))}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, **kwargs)
+        else:
+            conn = sqlite3.connect(self.db_path, **kwargs)
+            for pragma in self.PRAGMAS_ECRITURE:
+                conn.execute(pragma)
+        
+        for pragma in self.PRAGMAS_CONNEXION:
+            conn.execute(pragma)
+        return conn
+    
+    def _connexion_lecture(self) -> sqlite3.Connection:
+        """Retourne la connexion en lecture seule du thread courant (créée au besoin)"""
+        conn = getattr(self._tls, "conn", None)
+        if conn is None:
+            conn = self._connecter(lecture_seule=True, check_same_thread=False)
+            self._tls.conn = conn
+        return conn
+    
+    def _charger_fenetres(self):
+        """Initialise les statistiques glissantes à partir de l'historique en base"""
+        temps_limite = int(time.time()) - max(self.PERIODES_GLISSANTES) * 3600
+        conn = self._connexion_lecture()
+        
+        lignes_env = conn.execute("""
+            SELECT timestamp, temperature, humidite
+            FROM mesures_environnement
+            WHERE timestamp > ?
+            ORDER BY timestamp
+        """, (temps_limite,))
+        for timestamp, *valeurs in lignes_env:
+            self._ajouter_aux_fenetres(0, timestamp, tuple(valeurs))
+        
+        lignes_elec = conn.execute("""
+            SELECT timestamp, tension, courant, puissance, energie, frequence, facteur_puissance
+            FROM mesures_electriques
+            WHERE timestamp > ?
+            ORDER BY timestamp
+        """, (temps_limite,))
+        for timestamp, *valeurs in lignes_elec:
+            self._ajouter_aux_fenetres(1, timestamp, tuple(valeurs))
+    
+    def _ajouter_aux_fenetres(self, capteur: int, timestamp: int, valeurs: tuple):
+        """Ajoute une mesure (0: environnement, 1: électrique) aux statistiques glissantes"""
+        with self._lock_stats:
+            for fenetres in self._fenetres.values():
+                fenetres[capteur].ajouter(timestamp, valeurs)
+    
     def _creer_tables(self):
         """Crée automatiquement toutes les tables nécessaires"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connecter() as conn:
             cursor = conn.cursor()
+            cursor.execute("BEGIN")
+            
+            # Anciennes tables avec timestamp ISO (TEXT): reconstruites en INTEGER
+            tables_iso = []
+            for table in ('mesures_environnement', 'mesures_electriques'):
+                types = {col[1]: col[2] for col in cursor.execute(f"PRAGMA table_info({table})")}
+                if types.get('timestamp') == 'TEXT':
+                    cursor.execute(f"ALTER TABLE {table} RENAME TO {table}_iso")
+                    tables_iso.append(table)
             
             # Table des mesures environnementales (DHT22)
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS mesures_environnement (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp TEXT NOT NULL,
+                    timestamp INTEGER NOT NULL,
                     temperature REAL,
                     humidite REAL,
                     point_rosee REAL,
@@ -96,7 +352,7 @@ class DatabaseManager:
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS mesures_electriques (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp TEXT NOT NULL,
+                    timestamp INTEGER NOT NULL,
                     tension REAL,
                     courant REAL,
                     puissance REAL,
@@ -106,61 +362,204 @@ class DatabaseManager:
                 )
             """)
             
-            # Index pour performances
+            for table in tables_iso:
+                self._migrer_timestamps_iso(cursor, table)
+            
+            # Index couvrants: les requêtes de statistiques sont résolues
+            # entièrement dans l'index, sans accès à la table
             cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_env_timestamp 
-                ON mesures_environnement(timestamp)
+                CREATE INDEX IF NOT EXISTS idx_env_stats 
+                ON mesures_environnement(timestamp, temperature, humidite)
             """)
             
             cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_elec_timestamp 
-                ON mesures_electriques(timestamp)
+                CREATE INDEX IF NOT EXISTS idx_elec_stats 
+                ON mesures_electriques(timestamp, tension, courant, puissance,
+                                       energie, frequence, facteur_puissance)
             """)
             
+            # Agrégats par minute (bucket = timestamp // 60), conservés
+            # au-delà de la rétention des mesures brutes
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS mesures_environnement_1min (
+                    bucket INTEGER PRIMARY KEY,
+                    n INTEGER,
+                    avg_temperature REAL,
+                    min_temperature REAL,
+                    max_temperature REAL,
+                    avg_humidite REAL,
+                    min_humidite REAL,
+                    max_humidite REAL
+                )
+            """)
+            
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS mesures_electriques_1min (
+                    bucket INTEGER PRIMARY KEY,
+                    n INTEGER,
+                    avg_tension REAL,
+                    avg_courant REAL,
+                    avg_puissance REAL,
+                    max_puissance REAL,
+                    sum_energie REAL,
+                    avg_frequence REAL,
+                    avg_facteur_puissance REAL
+                )
+            """)
+            
+            # Remplacés par les index couvrants ci-dessus
+            cursor.execute("DROP INDEX IF EXISTS idx_env_timestamp")
+            cursor.execute("DROP INDEX IF EXISTS idx_elec_timestamp")
+            
             conn.commit()
             print("✅ Tables créées avec succès")
     
+    @staticmethod
+    def _migrer_timestamps_iso(cursor: sqlite3.Cursor, table: str):
+        """Recopie `<table>_iso` dans `table` en convertissant les timestamps ISO (heure locale) en epoch"""
+        colonnes = ", ".join(
+            col[1] for col in cursor.execute(f"PRAGMA table_info({table}_iso)")
+            if col[1] not in ('id', 'timestamp')
+        )
+        cursor.execute(f"""
+            INSERT INTO {table} (id, timestamp, {colonnes})
+            SELECT id, CAST(strftime('%s', timestamp, 'utc') AS INTEGER), {colonnes}
+            FROM {table}_iso
+        """)
+        print(f"✅ {table}: {cursor.rowcount} mesures migrées vers des timestamps epoch")
+        cursor.execute(f"DROP TABLE {table}_iso")
+    
     def inserer_mesure_environnement(self, mesure: MesureEnvironnement):
-        """Insère une mesure environnementale"""
-        with self.lock:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    INSERT INTO mesures_environnement 
-                    (timestamp, temperature, humidite, point_rosee, indice_chaleur)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (
-                    mesure.timestamp,
-                    mesure.temperature,
-                    mesure.humidite,
-                    mesure.point_rosee,
-                    mesure.indice_chaleur
-                ))
-                conn.commit()
+        """Met en file une mesure environnementale (écrite par lot)"""
+        self._ajouter_aux_fenetres(0, mesure.timestamp, (mesure.temperature, mesure.humidite))
+        # Le tuple nommé est directement dans l'ordre des paramètres de l'INSERT
+        self._write_queue.put(("env", mesure))
     
     def inserer_mesure_electrique(self, mesure: MesureElectrique):
-        """Insère une mesure électrique"""
-        with self.lock:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    INSERT INTO mesures_electriques 
-                    (timestamp, tension, courant, puissance, energie, frequence, facteur_puissance)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    mesure.timestamp,
-                    mesure.tension,
-                    mesure.courant,
-                    mesure.puissance,
-                    mesure.energie,
-                    mesure.frequence,
-                    mesure.facteur_puissance
-                ))
-                conn.commit()
+        """Met en file une mesure électrique (écrite par lot)"""
+        self._ajouter_aux_fenetres(1, mesure.timestamp, (
+            mesure.tension, mesure.courant, mesure.puissance,
+            mesure.energie, mesure.frequence, mesure.facteur_puissance
+        ))
+        self._write_queue.put(("elec", mesure))
+    
+    def _drainer_file(self):
+        """Récupère un lot de lignes de la file (TAILLE_LOT max ou DELAI_LOT secondes)"""
+        env_rows, elec_rows = [], []
+        arret = False
+        echeance = time.monotonic() + self.DELAI_LOT
+        
+        while len(env_rows) + len(elec_rows) < self.TAILLE_LOT:
+            restant = echeance - time.monotonic()
+            if restant <= 0:
+                break
+            try:
+                element = self._write_queue.get(timeout=restant)
+            except queue.Empty:
+                break
+            if element is None:
+                arret = True
+                break
+            
+            table, ligne = element
+            if table == "env":
+                env_rows.append(ligne)
+            else:
+                elec_rows.append(ligne)
+        
+        return env_rows, elec_rows, arret
+    
+    def _ecrire_lot(self, env_rows: List[tuple], elec_rows: List[tuple]):
+        """Écrit un lot de mesures dans une seule transaction"""
+        conn = self._conn_ecriture
+        try:
+            with conn:
+                conn.execute("BEGIN")
+                if env_rows:
+                    conn.executemany(self.SQL_INSERT_ENV, env_rows)
+                if elec_rows:
+                    conn.executemany(self.SQL_INSERT_ELEC, elec_rows)
+        except sqlite3.Error as e:
+            print(f"❌ Erreur écriture SQLite ({len(env_rows) + len(elec_rows)} mesures perdues): {e}")
+    
+    def _writer_loop(self):
+        """Thread écrivain: vide la file par lots jusqu'à la fermeture"""
+        while True:
+            env_rows, elec_rows, arret = self._drainer_file()
+            if env_rows or elec_rows:
+                self._ecrire_lot(env_rows, elec_rows)
+                self._lignes_depuis_analyze += len(env_rows) + len(elec_rows)
+            if arret:
+                break
+            self._maintenance()
+    
+    def _maintenance(self):
+        """Checkpoint du WAL et ANALYZE périodiques, exécutés entre deux lots"""
+        conn = self._conn_ecriture
+        try:
+            if time.monotonic() - self._dernier_checkpoint >= self.INTERVALLE_CHECKPOINT:
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                self._dernier_checkpoint = time.monotonic()
+            
+            if self._lignes_depuis_analyze >= self.LIGNES_AVANT_ANALYZE:
+                conn.execute("ANALYZE")
+                self._lignes_depuis_analyze = 0
+            
+            if time.monotonic() - self._derniere_agregation >= self.INTERVALLE_AGREGATION:
+                self._agreger_et_purger(conn)
+                self._derniere_agregation = time.monotonic()
+        except sqlite3.Error as e:
+            print(f"⚠️  Erreur maintenance SQLite: {e}")
+    
+    def _agreger_et_purger(self, conn: sqlite3.Connection):
+        """Met à jour les agrégats par minute puis supprime les mesures brutes expirées"""
+        limite_retention = int(time.time()) - self.RETENTION_JOURS * 86400
+        
+        with conn:
+            conn.execute("BEGIN")
+            
+            # Les deux dernières minutes agrégées sont recalculées: la plus
+            # récente était peut-être encore incomplète
+            debut = conn.execute(
+                "SELECT COALESCE(MAX(bucket), 0) - 1 FROM mesures_environnement_1min"
+            ).fetchone()[0]
+            conn.execute("""
+                INSERT OR REPLACE INTO mesures_environnement_1min
+                SELECT timestamp / 60, COUNT(*),
+                       AVG(temperature), MIN(temperature), MAX(temperature),
+                       AVG(humidite), MIN(humidite), MAX(humidite)
+                FROM mesures_environnement
+                WHERE timestamp >= ?
+                GROUP BY timestamp / 60
+            """, (debut * 60,))
+            
+            debut = conn.execute(
+                "SELECT COALESCE(MAX(bucket), 0) - 1 FROM mesures_electriques_1min"
+            ).fetchone()[0]
+            conn.execute("""
+                INSERT OR REPLACE INTO mesures_electriques_1min
+                SELECT timestamp / 60, COUNT(*),
+                       AVG(tension), AVG(courant), AVG(puissance), MAX(puissance),
+                       SUM(energie), AVG(frequence), AVG(facteur_puissance)
+                FROM mesures_electriques
+                WHERE timestamp >= ?
+                GROUP BY timestamp / 60
+            """, (debut * 60,))
+            
+            conn.execute("DELETE FROM mesures_environnement WHERE timestamp < ?", (limite_retention,))
+            conn.execute("DELETE FROM mesures_electriques WHERE timestamp < ?", (limite_retention,))
+    
+    def fermer(self):
+        """Écrit les mesures en attente et ferme la connexion d'écriture"""
+        if not self._thread_ecriture.is_alive():
+            return
+        self._write_queue.put(None)
+        self._thread_ecriture.join(timeout=10)
+        self._conn_ecriture.close()
     
     def obtenir_mesures_recentes(self, limite: int = 100) -> Dict:
         """Récupère les mesures récentes des deux capteurs"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connexion_lecture() as conn:
             cursor = conn.cursor()
             
             # Mesures environnement
@@ -188,41 +587,108 @@ class DatabaseManager:
     
     def obtenir_statistiques(self, heures: int = 24) -> Dict:
         """Calcule les statistiques sur une période"""
-        temps_limite = (datetime.now() - timedelta(hours=heures)).isoformat()
+        if heures not in self._fenetres:
+            return self._statistiques_agregees(heures)
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self._lock_stats:
+            env, elec = self._fenetres[heures]
+            maintenant = time.time()
+            env.purger(maintenant)
+            elec.purger(maintenant)
+            
+            return {
+                'environnement': {
+                    'nb_mesures': env.nombre,
+                    'temp_moy': env.moyenne(0),
+                    'temp_min': env.minimum(0),
+                    'temp_max': env.maximum(0),
+                    'hum_moy': env.moyenne(1),
+                    'hum_min': env.minimum(1),
+                    'hum_max': env.maximum(1)
+                },
+                'electrique': {
+                    'nb_mesures': elec.nombre,
+                    'tension_moy': elec.moyenne(0),
+                    'courant_moy': elec.moyenne(1),
+                    'puissance_moy': elec.moyenne(2),
+                    'puissance_max': elec.maximum(2),
+                    'energie_totale': elec.somme(3),
+                    'freq_moy': elec.moyenne(4),
+                    'fp_moy': elec.moyenne(5)
+                }
+            }
+    
+    def _statistiques_agregees(self, heures: int) -> Dict:
+        """Calcule les statistiques d'une période quelconque à partir des agrégats par minute
+        
+        La dernière minute agrégée (peut-être incomplète) et les mesures pas
+        encore agrégées sont lues dans les tables brutes.
+        """
+        bucket_limite = int((datetime.now() - timedelta(hours=heures)).timestamp()) // 60
+        
+        with self._connexion_lecture() as conn:
             cursor = conn.cursor()
             
-            # Stats environnement
+            # Stats environnement (moyennes pondérées par le nombre de mesures)
             cursor.execute("""
+                WITH frontiere AS (
+                    SELECT COALESCE(MAX(bucket), 0) AS b FROM mesures_environnement_1min
+                ),
+                morceaux AS (
+                    SELECT n, avg_temperature * n AS sum_t, min_temperature AS min_t,
+                           max_temperature AS max_t, avg_humidite * n AS sum_h,
+                           min_humidite AS min_h, max_humidite AS max_h
+                    FROM mesures_environnement_1min 
+                    WHERE bucket > :limite AND bucket < (SELECT b FROM frontiere)
+                    UNION ALL
+                    SELECT COUNT(*), SUM(temperature), MIN(temperature), MAX(temperature),
+                           SUM(humidite), MIN(humidite), MAX(humidite)
+                    FROM mesures_environnement 
+                    WHERE timestamp >= max((SELECT b FROM frontiere), :limite + 1) * 60
+                )
                 SELECT 
-                    COUNT(*) as nb_mesures,
-                    AVG(temperature) as temp_moy,
-                    MIN(temperature) as temp_min,
-                    MAX(temperature) as temp_max,
-                    AVG(humidite) as hum_moy,
-                    MIN(humidite) as hum_min,
-                    MAX(humidite) as hum_max
-                FROM mesures_environnement 
-                WHERE timestamp > ?
-            """, (temps_limite,))
+                    COALESCE(SUM(n), 0) as nb_mesures,
+                    SUM(sum_t) / SUM(n) as temp_moy,
+                    MIN(min_t) as temp_min,
+                    MAX(max_t) as temp_max,
+                    SUM(sum_h) / SUM(n) as hum_moy,
+                    MIN(min_h) as hum_min,
+                    MAX(max_h) as hum_max
+                FROM morceaux
+            """, {'limite': bucket_limite})
             columns_env = [desc[0] for desc in cursor.description]
             stats_env = dict(zip(columns_env, cursor.fetchone() or []))
             
             # Stats électriques
             cursor.execute("""
+                WITH frontiere AS (
+                    SELECT COALESCE(MAX(bucket), 0) AS b FROM mesures_electriques_1min
+                ),
+                morceaux AS (
+                    SELECT n, avg_tension * n AS sum_v, avg_courant * n AS sum_i,
+                           avg_puissance * n AS sum_p, max_puissance AS max_p,
+                           sum_energie AS sum_e, avg_frequence * n AS sum_f,
+                           avg_facteur_puissance * n AS sum_fp
+                    FROM mesures_electriques_1min 
+                    WHERE bucket > :limite AND bucket < (SELECT b FROM frontiere)
+                    UNION ALL
+                    SELECT COUNT(*), SUM(tension), SUM(courant), SUM(puissance),
+                           MAX(puissance), SUM(energie), SUM(frequence),
+                           SUM(facteur_puissance)
+                    FROM mesures_electriques 
+                    WHERE timestamp >= max((SELECT b FROM frontiere), :limite + 1) * 60
+                )
                 SELECT 
-                    COUNT(*) as nb_mesures,
-                    AVG(tension) as tension_moy,
-                    AVG(courant) as courant_moy,
-                    AVG(puissance) as puissance_moy,
-                    MAX(puissance) as puissance_max,
-                    SUM(energie) as energie_totale,
-                    AVG(frequence) as freq_moy,
-                    AVG(facteur_puissance) as fp_moy
-                FROM mesures_electriques 
-                WHERE timestamp > ?
-            """, (temps_limite,))
+                    COALESCE(SUM(n), 0) as nb_mesures,
+                    SUM(sum_v) / SUM(n) as tension_moy,
+                    SUM(sum_i) / SUM(n) as courant_moy,
+                    SUM(sum_p) / SUM(n) as puissance_moy,
+                    MAX(max_p) as puissance_max,
+                    SUM(sum_e) as energie_totale,
+                    SUM(sum_f) / SUM(n) as freq_moy,
+                    SUM(sum_fp) / SUM(n) as fp_moy
+                FROM morceaux
+            """, {'limite': bucket_limite})
             columns_elec = [desc[0] for desc in cursor.description]
             stats_elec = dict(zip(columns_elec, cursor.fetchone() or []))
             
@@ -271,10 +737,12 @@ class DHT22Sensor:
             return temp
         
         T, H = temp, hum
+        # Sous-produits communs calculés une seule fois
+        T2, H2, TH = T*T, H*H, T*H
         ic = (-8.78469475556 + 1.61139411*T + 2.33854883889*H 
-              - 0.14611605*T*H - 0.012308094*T*T 
-              - 0.0164248277778*H*H + 0.002211732*T*T*H 
-              + 0.00072546*T*H*H - 0.000003582*T*T*H*H)
+              - 0.14611605*TH - 0.012308094*T2 
+              - 0.0164248277778*H2 + 0.002211732*TH*T 
+              + 0.00072546*TH*H - 0.000003582*T2*H2)
         return ic
     
     def lire_mesure(self) -> Optional[MesureEnvironnement]:
@@ -301,15 +769,19 @@ class DHT22Sensor:
             indice_chaleur = self._calculer_indice_chaleur(temp, hum)
             
             return MesureEnvironnement(
-                timestamp=datetime.now().isoformat(),
+                timestamp=int(time.time()),
                 temperature=round(temp, 2),
                 humidite=round(hum, 2),
                 point_rosee=round(point_rosee, 2),
                 indice_chaleur=round(indice_chaleur, 2)
             )
             
-        except Exception as e:
-            print(f"❌ Erreur lecture DHT22: {e}")
+        except RuntimeError as e:
+            # Échec de checksum/timing: routinier sur le DHT22, pas de trace complète
+            logger.debug("Lecture DHT22 ignorée: %s", e)
+            return None
+        except Exception:
+            logger.exception("Erreur lecture DHT22")
             return None
 
 
@@ -317,18 +789,51 @@ class DHT22Sensor:
 # CAPTEUR PZEM-004T
 # ============================================================================
 
+def _calculer_table_crc16() -> tuple:
+    """Table du CRC16 ModBus (polynôme réfléchi 0xA001), un octet à la fois"""
+    table = []
+    for octet in range(256):
+        crc = octet
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+        table.append(crc)
+    return tuple(table)
+
+
+_CRC16_TABLE = _calculer_table_crc16()
+
+
+def crc16_modbus(trame) -> int:
+    """CRC16 ModBus RTU d'une trame (bytes ou bytearray)"""
+    crc = 0xFFFF
+    table = _CRC16_TABLE
+    for octet in trame:
+        crc = (crc >> 8) ^ table[(crc ^ octet) & 0xFF]
+    return crc
+
+
 class PZEMSensor:
-    """Gestion du capteur PZEM-004T via ModBus RTU"""
+    """Gestion du capteur PZEM-004T via ModBus RTU (trames construites à la main)"""
+    
+    # Réponse à la lecture de 10 registres: adresse, fonction, nb octets,
+    # 20 octets de données, CRC
+    TAILLE_REPONSE = 25
     
     def __init__(self, port: str = '/dev/ttyUSB0', slave_id: int = 1):
         self.port = port
         self.slave_id = slave_id
-        self.client = None
+        self.ser = None
         self.mode_simulation = not PZEM_DISPONIBLE
         
+        # Requête fixe: lecture des registres d'entrée 0x0000 à 0x0009 (fonction 0x04)
+        requete = bytes([slave_id, 0x04, 0x00, 0x00, 0x00, 0x0A])
+        crc = crc16_modbus(requete)
+        self._requete = requete + bytes([crc & 0xFF, crc >> 8])
+        self._reponse = bytearray(self.TAILLE_REPONSE)
+        
         if PZEM_DISPONIBLE:
             try:
-                self.client = ModbusSerialClient(
+                self.ser = serial.Serial(
                     port=port,
                     baudrate=9600,
                     bytesize=8,
@@ -336,11 +841,8 @@ class PZEMSensor:
                     stopbits=1,
                     timeout=1
                 )
-                if self.client.connect():
-                    print(f"✅ PZEM-004T initialisé sur {port}")
-                else:
-                    print(f"⚠️  Impossible de se connecter au PZEM-004T sur {port}")
-                    self.mode_simulation = True
+                print(f"✅ PZEM-004T initialisé sur {port}")
+                self._activer_faible_latence()
             except Exception as e:
                 print(f"⚠️  Erreur initialisation PZEM-004T: {e}")
                 self.mode_simulation = True
@@ -351,6 +853,26 @@ class PZEMSensor:
             self.sim_courant = 1.5
             self.sim_energie = 0.0
     
+    def _activer_faible_latence(self):
+        """Réduit la latence de l'adaptateur USB-série (16 ms par défaut sous Linux)"""
+        # 1. Adaptateurs FTDI: latency_timer exposé dans sysfs (root ou règle udev)
+        nom_tty = os.path.basename(os.path.realpath(self.port))
+        chemin = f"/sys/bus/usb-serial/devices/{nom_tty}/latency_timer"
+        try:
+            with open(chemin, 'w') as f:
+                f.write("1")
+            print(f"✅ Latence USB-série réglée à 1 ms ({nom_tty})")
+            return
+        except OSError:
+            pass
+        
+        # 2. Sinon, drapeau ASYNC_LOW_LATENCY via ioctl (géré par pyserial)
+        try:
+            self.ser.set_low_latency_mode(True)
+            print(f"✅ Mode faible latence activé sur {self.port}")
+        except (AttributeError, OSError, ValueError) as e:
+            print(f"⚠️  Mode faible latence indisponible sur {self.port}: {e}")
+    
     def lire_mesure(self) -> Optional[MesureElectrique]:
         """Lit une mesure du PZEM-004T"""
         try:
@@ -380,12 +902,10 @@ class PZEMSensor:
                 # 0x0007: Fréquence (Hz) - 1 registre / 10
                 # 0x0008: Facteur de puissance - 1 registre / 100
                 
-                result = self.client.read_input_registers(0x0000, 10, slave=self.slave_id)
-                
-                if result.isError():
+                regs = self._lire_registres()
+                if regs is None:
                     return None
                 
-                regs = result.registers
                 tension = regs[0] / 10.0
                 courant = ((regs[1] << 16) | regs[2]) / 1000.0
                 puissance = ((regs[3] << 16) | regs[4]) / 10.0
@@ -394,7 +914,7 @@ class PZEMSensor:
                 facteur_puissance = regs[8] / 100.0
             
             return MesureElectrique(
-                timestamp=datetime.now().isoformat(),
+                timestamp=int(time.time()),
                 tension=round(tension, 2),
                 courant=round(courant, 3),
                 puissance=round(puissance, 2),
@@ -403,15 +923,33 @@ class PZEMSensor:
                 facteur_puissance=round(facteur_puissance, 2)
             )
             
-        except Exception as e:
-            print(f"❌ Erreur lecture PZEM-004T: {e}")
+        except Exception:
+            logger.exception("Erreur lecture PZEM-004T")
             return None
     
+    def _lire_registres(self) -> Optional[tuple]:
+        """Envoie la requête ModBus et décode les 10 registres (None si réponse invalide)"""
+        ser = self.ser
+        reponse = self._reponse
+        
+        ser.reset_input_buffer()
+        ser.write(self._requete)
+        n = ser.readinto(reponse)
+        
+        if (n != self.TAILLE_REPONSE or reponse[0] != self.slave_id
+                or reponse[1] != 0x04 or reponse[2] != 20):
+            return None
+        crc = crc16_modbus(memoryview(reponse)[:23])
+        if reponse[23] != crc & 0xFF or reponse[24] != crc >> 8:
+            return None
+        
+        return struct.unpack_from('>10H', reponse, 3)
+    
     def __del__(self):
         """Fermeture de la connexion"""
-        if self.client and not self.mode_simulation:
+        if self.ser and not self.mode_simulation:
             try:
-                self.client.close()
+                self.ser.close()
             except:
                 pass
 
@@ -423,10 +961,15 @@ class PZEMSensor:
 class SystemeSurveillance:
     """Système principal de surveillance DHT22 + PZEM-004T"""
     
+    # Durée de validité (secondes) des réponses mises en cache pour le dashboard
+    TTL_DONNEES = 2
+    TTL_STATS_7J = 30
+    
     def __init__(self, 
                  dht_gpio: int = 4,
                  pzem_port: str = '/dev/ttyUSB0',
-                 db_path: str = "surveillance.db"):
+                 db_path: str = "surveillance.db",
+                 affichage_terminal: bool = True):
         
         print("🔧 Initialisation du Système de Surveillance")
         print("=" * 70)
@@ -438,12 +981,20 @@ class SystemeSurveillance:
         
         # Configuration
         self.intervalle_mesure = 3  # secondes
+        self.affichage_terminal = affichage_terminal
         self.running = False
         
-        # Dernières données pour l'interface web
-        self.dernieres_mesures_env = deque(maxlen=100)
-        self.dernieres_mesures_elec = deque(maxlen=100)
-        self.lock = Lock()
+        # Lectures des deux capteurs en parallèle (DHT22 et PZEM bloquent sur leurs E/S)
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="capteur")
+        
+        # Dernières données pour l'interface web: (mesure, fragment JSON)
+        # (écrites uniquement par le thread de mesure, lues sans verrou par Flask)
+        self.dernieres_mesures_env = TamponCirculaire(100)
+        self.dernieres_mesures_elec = TamponCirculaire(100)
+        
+        # Cache des réponses du dashboard: clé -> (expiration, valeur)
+        self._cache = {}
+        self._cache_lock = Lock()
         
         print("=" * 70)
         print("✅ Système initialisé avec succès\n")
@@ -452,55 +1003,62 @@ class SystemeSurveillance:
         """Exécute un cycle de mesure complet"""
         timestamp = datetime.now()
         
-        # 1. Lire DHT22
-        mesure_env = self.dht22.lire_mesure()
+        # 1. Lire DHT22 et PZEM-004T en parallèle
+        futur_env = self._pool.submit(self.dht22.lire_mesure)
+        futur_elec = self._pool.submit(self.pzem.lire_mesure)
+        mesure_env = futur_env.result()
+        mesure_elec = futur_elec.result()
+        
+        # 2. Enregistrer DHT22
         if mesure_env:
             self.db.inserer_mesure_environnement(mesure_env)
-            with self.lock:
-                self.dernieres_mesures_env.append(asdict(mesure_env))
+            self.dernieres_mesures_env.ajouter((mesure_env, json_bytes(mesure_env._asdict())))
         
-        # 2. Lire PZEM-004T
-        mesure_elec = self.pzem.lire_mesure()
+        # 3. Enregistrer PZEM-004T
         if mesure_elec:
             self.db.inserer_mesure_electrique(mesure_elec)
-            with self.lock:
-                self.dernieres_mesures_elec.append(asdict(mesure_elec))
+            self.dernieres_mesures_elec.ajouter((mesure_elec, json_bytes(mesure_elec._asdict())))
         
-        # 3. Afficher dans le terminal
-        self._afficher_terminal(mesure_env, mesure_elec)
+        # 4. Afficher dans le terminal
+        if self.affichage_terminal:
+            self._afficher_terminal(mesure_env, mesure_elec)
     
     def _afficher_terminal(self, env: Optional[MesureEnvironnement], 
                           elec: Optional[MesureElectrique]):
-        """Affiche les mesures dans le terminal"""
+        """Affiche les mesures dans le terminal (une seule écriture par cycle)"""
         heure = datetime.now().strftime('%H:%M:%S')
+        lignes = []
         
-        print(f"\n{'=' * 70}")
-        print(f"📊 [{heure}] MESURES EN TEMPS RÉEL")
-        print(f"{'=' * 70}")
+        lignes.append(f"\n{'=' * 70}")
+        lignes.append(f"📊 [{heure}] MESURES EN TEMPS RÉEL")
+        lignes.append(f"{'=' * 70}")
         
         # Environnement (DHT22)
         if env:
-            print(f"\n🌡️  ENVIRONNEMENT (DHT22):")
-            print(f"   ├─ Température      : {env.temperature:6.2f} °C")
-            print(f"   ├─ Humidité         : {env.humidite:6.2f} %")
-            print(f"   ├─ Point de rosée   : {env.point_rosee:6.2f} °C")
-            print(f"   └─ Indice chaleur   : {env.indice_chaleur:6.2f} °C")
+            lignes.append(f"\n🌡️  ENVIRONNEMENT (DHT22):")
+            lignes.append(f"   ├─ Température      : {env.temperature:6.2f} °C")
+            lignes.append(f"   ├─ Humidité         : {env.humidite:6.2f} %")
+            lignes.append(f"   ├─ Point de rosée   : {env.point_rosee:6.2f} °C")
+            lignes.append(f"   └─ Indice chaleur   : {env.indice_chaleur:6.2f} °C")
         else:
-            print(f"\n🌡️  ENVIRONNEMENT (DHT22): ❌ Erreur de lecture")
+            lignes.append(f"\n🌡️  ENVIRONNEMENT (DHT22): ❌ Erreur de lecture")
         
         # Électrique (PZEM-004T)
         if elec:
-            print(f"\n⚡ ÉLECTRIQUE (PZEM-004T):")
-            print(f"   ├─ Tension          : {elec.tension:6.2f} V")
-            print(f"   ├─ Courant          : {elec.courant:6.3f} A")
-            print(f"   ├─ Puissance        : {elec.puissance:6.2f} W")
-            print(f"   ├─ Énergie          : {elec.energie:6.3f} kWh")
-            print(f"   ├─ Fréquence        : {elec.frequence:6.2f} Hz")
-            print(f"   └─ Facteur puissance: {elec.facteur_puissance:6.2f}")
+            lignes.append(f"\n⚡ ÉLECTRIQUE (PZEM-004T):")
+            lignes.append(f"   ├─ Tension          : {elec.tension:6.2f} V")
+            lignes.append(f"   ├─ Courant          : {elec.courant:6.3f} A")
+            lignes.append(f"   ├─ Puissance        : {elec.puissance:6.2f} W")
+            lignes.append(f"   ├─ Énergie          : {elec.energie:6.3f} kWh")
+            lignes.append(f"   ├─ Fréquence        : {elec.frequence:6.2f} Hz")
+            lignes.append(f"   └─ Facteur puissance: {elec.facteur_puissance:6.2f}")
         else:
-            print(f"\n⚡ ÉLECTRIQUE (PZEM-004T): ❌ Erreur de lecture")
+            lignes.append(f"\n⚡ ÉLECTRIQUE (PZEM-004T): ❌ Erreur de lecture")
+        
+        lignes.append(f"{'=' * 70}")
         
-        print(f"{'=' * 70}")
+        sys.stdout.write("\n".join(lignes) + "\n")
+        sys.stdout.flush()
     
     def boucle_surveillance(self):
         """Boucle principale de surveillance"""
@@ -510,9 +1068,18 @@ class SystemeSurveillance:
         self.running = True
         
         try:
+            # Cadence fixe: la durée du cycle est déduite de l'attente
+            prochain_cycle = time.monotonic()
             while self.running:
                 self.cycle_mesure()
-                time.sleep(self.intervalle_mesure)
+                prochain_cycle += self.intervalle_mesure
+                attente = prochain_cycle - time.monotonic()
+                if attente > 0:
+                    time.sleep(attente)
+                else:
+                    # Cycle plus long que l'intervalle: repartir de maintenant
+                    # plutôt qu'enchaîner des cycles en rattrapage
+                    prochain_cycle = time.monotonic()
                 
         except KeyboardInterrupt:
             print("\n\n🛑 Arrêt demandé...")
@@ -522,17 +1089,57 @@ class SystemeSurveillance:
     def arreter(self):
         """Arrête proprement le système"""
         self.running = False
+        self._pool.shutdown(wait=True)
+        self.db.fermer()
         print("✅ Système arrêté proprement")
     
-    def obtenir_donnees_dashboard(self) -> Dict:
-        """Retourne les données pour le dashboard web"""
-        with self.lock:
-            return {
-                'mesures_environnement': list(self.dernieres_mesures_env),
-                'mesures_electriques': list(self.dernieres_mesures_elec),
-                'statistiques': self.db.obtenir_statistiques(heures=24),
-                'timestamp': datetime.now().isoformat()
-            }
+    def _cached(self, cle: str, ttl: float, fn):
+        """Retourne la valeur en cache pour `cle`, recalculée via `fn` après `ttl` secondes"""
+        maintenant = time.monotonic()
+        with self._cache_lock:
+            entree = self._cache.get(cle)
+            if entree and entree[0] > maintenant:
+                return entree[1]
+        
+        valeur = fn()
+        with self._cache_lock:
+            self._cache[cle] = (maintenant + ttl, valeur)
+        return valeur
+    
+    def _statistiques_24h(self) -> Dict:
+        """Statistiques des dernières 24h (mises en cache)"""
+        return self._cached(
+            'stats_24h', self.TTL_DONNEES,
+            lambda: self.db.obtenir_statistiques(heures=24))
+    
+    def donnees_dashboard_json(self) -> bytes:
+        """Données du dashboard sérialisées en JSON (mises en cache)
+        
+        Assemblées à partir des fragments JSON calculés à l'acquisition de
+        chaque mesure: seules les statistiques sont sérialisées ici.
+        """
+        def assembler():
+            env = self.dernieres_mesures_env.elements()
+            elec = self.dernieres_mesures_elec.elements()
+            return b''.join((
+                b'{"mesures_environnement":[', b','.join(j for _, j in env),
+                b'],"mesures_electriques":[', b','.join(j for _, j in elec),
+                b'],"statistiques":', json_bytes(self._statistiques_24h()),
+                b',"timestamp":', json_bytes(datetime.now().isoformat()),
+                b'}'
+            ))
+        return self._cached('donnees', self.TTL_DONNEES, assembler)
+    
+    def statistiques_json(self) -> bytes:
+        """Statistiques 24h et 7 jours déjà sérialisées en JSON (mises en cache)"""
+        def calculer():
+            return json_bytes({
+                'stats_24h': self._statistiques_24h(),
+                'stats_7j': self._cached(
+                    'stats_7j', self.TTL_STATS_7J,
+                    lambda: self.db.obtenir_statistiques(heures=24*7))
+            })
+        return self._cached('statistiques', self.TTL_DONNEES, calculer)
 
 
 # ============================================================================
@@ -545,34 +1152,58 @@ systeme = None
 # Chemin du fichier HTML
 HTML_DIR = os.path.dirname(os.path.abspath(__file__))
 
+# Dashboard statique chargé une fois: version brute, version gzip et ETag
+try:
+    with open(os.path.join(HTML_DIR, 'dashboard.html'), 'rb') as f:
+        DASHBOARD_HTML = f.read()
+    DASHBOARD_HTML_GZ = gzip.compress(DASHBOARD_HTML, 9)
+    DASHBOARD_ETAG = f'"{hashlib.blake2b(DASHBOARD_HTML, digest_size=8).hexdigest()}"'
+except OSError:
+    DASHBOARD_HTML = None
+
 @app.route('/')
 def index():
     """Page principale"""
-    return send_from_directory(HTML_DIR, 'dashboard.html')
+    if DASHBOARD_HTML is None:
+        return send_from_directory(HTML_DIR, 'dashboard.html')
+    
+    entetes = {
+        'ETag': DASHBOARD_ETAG,
+        'Cache-Control': 'public, max-age=60',
+        'Vary': 'Accept-Encoding'
+    }
+    if DASHBOARD_ETAG in request.headers.get('If-None-Match', ''):
+        return Response(status=304, headers=entetes)
+    
+    if 'gzip' in request.headers.get('Accept-Encoding', ''):
+        entetes['Content-Encoding'] = 'gzip'
+        return Response(DASHBOARD_HTML_GZ, mimetype='text/html', headers=entetes)
+    return Response(DASHBOARD_HTML, mimetype='text/html', headers=entetes)
 
 @app.route('/api/donnees')
 def api_donnees():
     """API: Données en temps réel"""
     if systeme:
-        return jsonify(systeme.obtenir_donnees_dashboard())
+        return Response(systeme.donnees_dashboard_json(), mimetype='application/json')
     return jsonify({'error': 'Système non initialisé'}), 503
 
 @app.route('/api/statistiques')
 def api_statistiques():
     """API: Statistiques"""
     if systeme:
-        return jsonify({
-            'stats_24h': systeme.db.obtenir_statistiques(heures=24),
-            'stats_7j': systeme.db.obtenir_statistiques(heures=24*7)
-        })
+        return Response(systeme.statistiques_json(), mimetype='application/json')
     return jsonify({'error': 'Système non initialisé'}), 503
 
 
 def demarrer_serveur_web(port=5000):
-    """Démarre le serveur web Flask"""
+    """Démarre le serveur web Flask (via waitress si disponible)"""
     print(f"\n🌐 Serveur web démarré sur http://0.0.0.0:{port}")
     print(f"   Accédez au dashboard: http://localhost:{port}")
-    app.run(host='0.0.0.0', port=port, debug=False, use_reloader=False)
+    if WAITRESS_DISPONIBLE:
+        # Requêtes traitées en parallèle: les clients ne s'attendent plus entre eux
+        serve(app, host='0.0.0.0', port=port, threads=4)
+    else:
+        app.run(host='0.0.0.0', port=port, debug=False, use_reloader=False)
 
 
 # ============================================================================
@@ -580,6 +1211,14 @@ def demarrer_serveur_web(port=5000):
 # ============================================================================
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Surveillance DHT22 + PZEM-004T")
+    parser.add_argument('--daemon', action='store_true',
+                        help="mode service: pas d'affichage des mesures dans le terminal")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    
     print("\n" + "="*70)
     print(" 🚀 SYSTÈME DE SURVEILLANCE DHT22 + PZEM-004T")
     print("="*70 + "\n")
@@ -592,7 +1231,8 @@ if __name__ == "__main__":
     # Créer le système
     systeme = SystemeSurveillance(
         dht_gpio=DHT_GPIO_PIN,
-        pzem_port=PZEM_PORT
+        pzem_port=PZEM_PORT,
+        affichage_terminal=not args.daemon
     )
     
     # Démarrer le serveur web dans un thread séparé
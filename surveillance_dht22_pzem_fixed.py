@@ -5,17 +5,21 @@ Affichage Terminal + Serveur Web + Base de données SQLite
 """
 
 import sqlite3
+import atexit
 import time
 import json
 import serial
-from datetime import datetime, timedelta
+from datetime import datetime
 from threading import Thread, Lock
-from flask import Flask, jsonify, send_from_directory
+from flask import Flask, Response, jsonify, request, send_from_directory
 import os
+import sys
+import signal
+import gzip
 from collections import deque
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from typing import Dict, List, Optional
-import math
+from math import log as _log
 
 # Import pour DHT22 sur Raspberry Pi 5
 import board
@@ -25,6 +29,14 @@ import adafruit_dht
 import modbus_tk.defines as cst
 from modbus_tk import modbus_rtu
 
+# Serveur WSGI multi-thread (optionnel, repli sur le serveur Flask)
+try:
+    from waitress import serve
+    WAITRESS_DISPONIBLE = True
+except ImportError:
+    print("⚠️  waitress non installé - Serveur de développement Flask")
+    WAITRESS_DISPONIBLE = False
+
 
 # ============================================================================
 # MODÈLE DE DONNÉES
@@ -33,17 +45,26 @@ from modbus_tk import modbus_rtu
 @dataclass
 class MesureEnvironnement:
     """Mesure DHT22: température et humidité"""
-    timestamp: str
+    timestamp: int            # epoch (millisecondes)
     temperature_C: float
     humidity_pct: float
     point_rosee: float
     indice_chaleur: float
+    
+    def ligne_sql(self) -> tuple:
+        """Paramètres de l'INSERT, dans l'ordre des colonnes"""
+        return (self.timestamp, self.temperature_C, self.humidity_pct,
+                self.point_rosee, self.indice_chaleur)
+    
+    def vers_dict(self) -> Dict:
+        """Mesure pour le dashboard (timestamp ISO)"""
+        return dict(self.__dict__, timestamp=horodatage_iso(self.timestamp))
 
 
 @dataclass
 class MesureElectrique:
     """Mesure PZEM-004T: paramètres électriques"""
-    timestamp: str
+    timestamp: int            # epoch (millisecondes)
     voltage_V: float          # Volts
     current_A: float          # Ampères
     power_W: float            # Watts
@@ -51,31 +72,200 @@ class MesureElectrique:
     frequency_Hz: float       # Hz
     power_factor: float       # 0-1
     alarm: int                # Alarme
+    
+    def ligne_sql(self) -> tuple:
+        """Paramètres de l'INSERT, dans l'ordre des colonnes"""
+        return (self.timestamp, self.voltage_V, self.current_A, self.power_W,
+                self.energy_Wh, self.frequency_Hz, self.power_factor, self.alarm)
+    
+    def vers_dict(self) -> Dict:
+        """Mesure pour le dashboard: timestamp ISO, valeurs arrondies à l'affichage"""
+        return {
+            'timestamp': horodatage_iso(self.timestamp),
+            'voltage_V': round(self.voltage_V, 2),
+            'current_A': round(self.current_A, 3),
+            'power_W': round(self.power_W, 2),
+            'energy_Wh': self.energy_Wh,
+            'frequency_Hz': round(self.frequency_Hz, 2),
+            'power_factor': round(self.power_factor, 2),
+            'alarm': self.alarm
+        }
+
+
+def horodatage_iso(timestamp_ms: int) -> str:
+    """Vue ISO 8601 (heure locale) d'un timestamp epoch en millisecondes"""
+    return datetime.fromtimestamp(timestamp_ms / 1000).isoformat()
 
 
 # ============================================================================
 # GESTIONNAIRE DE BASE DE DONNÉES
 # ============================================================================
 
+# Requêtes d'insertion: toujours le même objet chaîne, donc préparées une
+# seule fois puis servies par le cache de requêtes de la connexion
+INSERT_ENV_SQL = """
+    INSERT INTO mesures_environnement 
+    (timestamp, temperature_C, humidity_pct, point_rosee, indice_chaleur)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+INSERT_ELEC_SQL = """
+    INSERT INTO mesures_electriques 
+    (timestamp, voltage_V, current_A, power_W, energy_Wh, frequency_Hz, power_factor, alarm)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+# Agrégats horaires (équivalent d'une vue matérialisée): les lots insérés
+# sont cumulés dans la ligne (heure, type de mesure) correspondante
+MS_PAR_HEURE = 3_600_000
+
+UPSERT_AGREGAT_ENV_SQL = """
+    INSERT INTO aggregats_horaires
+    (hour_bucket, table_kind, n, sum_t, min_t, max_t, sum_h, min_h, max_h)
+    VALUES (?, 'env', ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(hour_bucket, table_kind) DO UPDATE SET
+        n = n + excluded.n,
+        sum_t = sum_t + excluded.sum_t,
+        min_t = min(min_t, excluded.min_t),
+        max_t = max(max_t, excluded.max_t),
+        sum_h = sum_h + excluded.sum_h,
+        min_h = min(min_h, excluded.min_h),
+        max_h = max(max_h, excluded.max_h)
+"""
+
+UPSERT_AGREGAT_ELEC_SQL = """
+    INSERT INTO aggregats_horaires
+    (hour_bucket, table_kind, n, sum_v, sum_i, sum_p, max_p, sum_e, sum_f, sum_pf)
+    VALUES (?, 'elec', ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(hour_bucket, table_kind) DO UPDATE SET
+        n = n + excluded.n,
+        sum_v = sum_v + excluded.sum_v,
+        sum_i = sum_i + excluded.sum_i,
+        sum_p = sum_p + excluded.sum_p,
+        max_p = max(max_p, excluded.max_p),
+        sum_e = sum_e + excluded.sum_e,
+        sum_f = sum_f + excluded.sum_f,
+        sum_pf = sum_pf + excluded.sum_pf
+"""
+
+# Statistiques des deux capteurs en une requête: la fenêtre d'agrégats est
+# évaluée une seule fois (MATERIALIZED à partir de SQLite 3.35).
+# Fenêtre exacte [:debut, maintenant]: heures complètes postérieures à l'heure
+# de :debut depuis les agrégats, et fin de cette heure (partielle) depuis les
+# tables brutes.
+_CTE_MATERIALIZED = "MATERIALIZED" if sqlite3.sqlite_version_info >= (3, 35, 0) else ""
+
+STATISTIQUES_SQL = f"""
+    WITH fenetre AS {_CTE_MATERIALIZED} (
+        SELECT table_kind, n, sum_t, min_t, max_t, sum_h, min_h, max_h,
+               sum_v, sum_i, sum_p, max_p, sum_e, sum_f, sum_pf
+        FROM aggregats_horaires WHERE hour_bucket > :heure
+        UNION ALL
+        SELECT 'env', COUNT(*),
+               SUM(temperature_C), MIN(temperature_C), MAX(temperature_C),
+               SUM(humidity_pct), MIN(humidity_pct), MAX(humidity_pct),
+               NULL, NULL, NULL, NULL, NULL, NULL, NULL
+        FROM mesures_environnement
+        WHERE timestamp >= :debut AND timestamp < (:heure + 1) * {MS_PAR_HEURE}
+        UNION ALL
+        SELECT 'elec', COUNT(*), NULL, NULL, NULL, NULL, NULL, NULL,
+               SUM(voltage_V), SUM(current_A), SUM(power_W), MAX(power_W),
+               SUM(energy_Wh), SUM(frequency_Hz), SUM(power_factor)
+        FROM mesures_electriques
+        WHERE timestamp >= :debut AND timestamp < (:heure + 1) * {MS_PAR_HEURE}
+    )
+    SELECT 
+        table_kind,
+        SUM(n) as nb_mesures,
+        SUM(sum_t) / SUM(n) as temp_moy,
+        MIN(min_t) as temp_min,
+        MAX(max_t) as temp_max,
+        SUM(sum_h) / SUM(n) as hum_moy,
+        MIN(min_h) as hum_min,
+        MAX(max_h) as hum_max,
+        SUM(sum_v) / SUM(n) as tension_moy,
+        SUM(sum_i) / SUM(n) as courant_moy,
+        SUM(sum_p) / SUM(n) as puissance_moy,
+        MAX(max_p) as puissance_max,
+        SUM(sum_e) as energie_totale,
+        SUM(sum_f) / SUM(n) as freq_moy,
+        SUM(sum_pf) / SUM(n) as fp_moy
+    FROM fenetre
+    GROUP BY table_kind
+"""
+
+# Colonnes renvoyées pour chaque type de mesure
+COLONNES_STATS = {
+    'env': ('nb_mesures', 'temp_moy', 'temp_min', 'temp_max',
+            'hum_moy', 'hum_min', 'hum_max'),
+    'elec': ('nb_mesures', 'tension_moy', 'courant_moy', 'puissance_moy',
+             'puissance_max', 'energie_totale', 'freq_moy', 'fp_moy'),
+}
+
+
 class DatabaseManager:
     """Gestion de la base de données SQLite avec création automatique"""
     
+    # PRAGMAs appliqués à chaque connexion: journal WAL et synchronous=NORMAL
+    # (un fsync par checkpoint au lieu de deux par commit sur la carte SD)
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA temp_store=MEMORY",
+        # Lectures servies par mmap (256 Mio, 128 Mio sur un OS 32 bits
+        # pour ménager l'espace d'adressage)
+        f"PRAGMA mmap_size={268435456 if sys.maxsize > 2**32 else 134217728}",
+        "PRAGMA cache_size=-65536",
+        "PRAGMA busy_timeout=5000",
+    )
+    
     def __init__(self, db_path: str = "surveillance.db"):
         self.db_path = db_path
         self.lock = Lock()
+        
+        # Connexion persistante partagée (thread de mesure + serveur web),
+        # sérialisée par self.lock: le cache de pages reste chaud
+        self.conn = self._connect()
+        self.conn.row_factory = sqlite3.Row  # dict(row) construit en C
+        atexit.register(self.conn.close)
+        
+        # PRAGMA optimize périodique (statistiques du planificateur à jour)
+        self.intervalle_optimize = 900  # secondes
+        self._last_optimize = time.monotonic()
+        
         self._creer_tables()
         print(f"✅ Base de données initialisée: {db_path}")
     
+    def _connect(self) -> sqlite3.Connection:
+        """Ouvre une connexion SQLite configurée avec les PRAGMAs du projet"""
+        # isolation_level=None: pas de BEGIN implicite, les transactions
+        # sont ouvertes explicitement (voir inserer_batch)
+        conn = sqlite3.connect(self.db_path, check_same_thread=False,
+                               cached_statements=256, isolation_level=None)
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    
     def _creer_tables(self):
         """Crée automatiquement toutes les tables nécessaires"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self.lock:
+            cursor = self.conn.cursor()
+            cursor.execute("BEGIN")
+            
+            # Anciennes tables avec timestamp ISO (TEXT): reconstruites en INTEGER
+            tables_iso = []
+            for table in ('mesures_environnement', 'mesures_electriques'):
+                types = {col[1]: col[2] for col in cursor.execute(f"PRAGMA table_info({table})")}
+                if types.get('timestamp') == 'TEXT':
+                    cursor.execute(f"ALTER TABLE {table} RENAME TO {table}_iso")
+                    tables_iso.append(table)
             
             # Table des mesures environnementales (DHT22)
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS mesures_environnement (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp TEXT NOT NULL,
+                    timestamp INTEGER NOT NULL,
                     temperature_C REAL,
                     humidity_pct REAL,
                     point_rosee REAL,
@@ -87,7 +277,7 @@ class DatabaseManager:
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS mesures_electriques (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp TEXT NOT NULL,
+                    timestamp INTEGER NOT NULL,
                     voltage_V REAL,
                     current_A REAL,
                     power_W REAL,
@@ -98,81 +288,169 @@ class DatabaseManager:
                 )
             """)
             
-            # Index pour performances
+            for table in tables_iso:
+                self._migrer_timestamps_iso(cursor, table)
+            
+            # Agrégats horaires des deux capteurs (colonnes NULL pour l'autre type)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS aggregats_horaires (
+                    hour_bucket INTEGER NOT NULL,
+                    table_kind TEXT NOT NULL,
+                    n INTEGER NOT NULL,
+                    sum_t REAL, min_t REAL, max_t REAL,
+                    sum_h REAL, min_h REAL, max_h REAL,
+                    sum_v REAL, sum_i REAL, sum_p REAL, max_p REAL,
+                    sum_e REAL, sum_f REAL, sum_pf REAL,
+                    PRIMARY KEY (hour_bucket, table_kind)
+                )
+            """)
+            
+            # Première création: agrégation de l'historique existant
+            if cursor.execute("SELECT COUNT(*) FROM aggregats_horaires").fetchone()[0] == 0:
+                cursor.execute(f"""
+                    INSERT INTO aggregats_horaires
+                    (hour_bucket, table_kind, n, sum_t, min_t, max_t, sum_h, min_h, max_h)
+                    SELECT timestamp / {MS_PAR_HEURE}, 'env', COUNT(*),
+                           SUM(temperature_C), MIN(temperature_C), MAX(temperature_C),
+                           SUM(humidity_pct), MIN(humidity_pct), MAX(humidity_pct)
+                    FROM mesures_environnement
+                    GROUP BY timestamp / {MS_PAR_HEURE}
+                """)
+                cursor.execute(f"""
+                    INSERT INTO aggregats_horaires
+                    (hour_bucket, table_kind, n, sum_v, sum_i, sum_p, max_p, sum_e, sum_f, sum_pf)
+                    SELECT timestamp / {MS_PAR_HEURE}, 'elec', COUNT(*),
+                           SUM(voltage_V), SUM(current_A), SUM(power_W), MAX(power_W),
+                           SUM(energy_Wh), SUM(frequency_Hz), SUM(power_factor)
+                    FROM mesures_electriques
+                    GROUP BY timestamp / {MS_PAR_HEURE}
+                """)
+            
+            # Index couvrants: obtenir_mesures_recentes est servi depuis l'index
+            # seul (le rowid `id` y est inclus), sans accès à la table
             cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_env_timestamp 
-                ON mesures_environnement(timestamp)
+                CREATE INDEX IF NOT EXISTS idx_env_cover 
+                ON mesures_environnement(timestamp DESC, temperature_C, humidity_pct,
+                                         point_rosee, indice_chaleur)
             """)
             
             cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_elec_timestamp 
-                ON mesures_electriques(timestamp)
+                CREATE INDEX IF NOT EXISTS idx_elec_cover 
+                ON mesures_electriques(timestamp DESC, voltage_V, current_A, power_W,
+                                       energy_Wh, frequency_Hz, power_factor, alarm)
             """)
             
-            conn.commit()
+            # Anciens index sur timestamp seul, redondants avec les index couvrants
+            cursor.execute("DROP INDEX IF EXISTS idx_env_timestamp")
+            cursor.execute("DROP INDEX IF EXISTS idx_elec_timestamp")
+            
+            self.conn.commit()
+            self.conn.execute("PRAGMA optimize")
             print("✅ Tables créées avec succès")
     
+    @staticmethod
+    def _migrer_timestamps_iso(cursor: sqlite3.Cursor, table: str):
+        """Recopie `<table>_iso` dans `table` en convertissant les timestamps ISO (heure locale) en epoch ms"""
+        colonnes = ", ".join(
+            col[1] for col in cursor.execute(f"PRAGMA table_info({table}_iso)")
+            if col[1] not in ('id', 'timestamp')
+        )
+        cursor.execute(f"""
+            INSERT INTO {table} (id, timestamp, {colonnes})
+            SELECT id, CAST(ROUND((julianday(timestamp, 'utc') - 2440587.5) * 86400000) AS INTEGER), {colonnes}
+            FROM {table}_iso
+        """)
+        print(f"✅ {table}: {cursor.rowcount} mesures migrées vers des timestamps epoch")
+        cursor.execute(f"DROP TABLE {table}_iso")
+    
     def inserer_mesure_environnement(self, mesure: MesureEnvironnement):
         """Insère une mesure environnementale"""
-        with self.lock:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    INSERT INTO mesures_environnement 
-                    (timestamp, temperature_C, humidity_pct, point_rosee, indice_chaleur)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (
-                    mesure.timestamp,
-                    mesure.temperature_C,
-                    mesure.humidity_pct,
-                    mesure.point_rosee,
-                    mesure.indice_chaleur
-                ))
-                conn.commit()
+        self.inserer_batch([mesure.ligne_sql()], [])
     
     def inserer_mesure_electrique(self, mesure: MesureElectrique):
         """Insère une mesure électrique"""
+        self.inserer_batch([], [mesure.ligne_sql()])
+    
+    def inserer_batch(self, env_rows: List[tuple], elec_rows: List[tuple]):
+        """Insère un lot de mesures des deux capteurs dans une seule transaction"""
         with self.lock:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    INSERT INTO mesures_electriques 
-                    (timestamp, voltage_V, current_A, power_W, energy_Wh, frequency_Hz, power_factor, alarm)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    mesure.timestamp,
-                    mesure.voltage_V,
-                    mesure.current_A,
-                    mesure.power_W,
-                    mesure.energy_Wh,
-                    mesure.frequency_Hz,
-                    mesure.power_factor,
-                    mesure.alarm
-                ))
-                conn.commit()
+            try:
+                self.conn.execute("BEGIN IMMEDIATE")
+                self.conn.executemany(INSERT_ENV_SQL, env_rows)
+                self.conn.executemany(INSERT_ELEC_SQL, elec_rows)
+                self.conn.executemany(UPSERT_AGREGAT_ENV_SQL, self._agreger_env(env_rows))
+                self.conn.executemany(UPSERT_AGREGAT_ELEC_SQL, self._agreger_elec(elec_rows))
+                self.conn.commit()
+            except sqlite3.Error:
+                self.conn.rollback()
+                raise
+            
+            if time.monotonic() - self._last_optimize > self.intervalle_optimize:
+                self.conn.execute("PRAGMA optimize")
+                self._last_optimize = time.monotonic()
+    
+    @staticmethod
+    def _agreger_env(rows: List[tuple]) -> List[tuple]:
+        """Agrégats horaires partiels (paramètres de UPSERT_AGREGAT_ENV_SQL) d'un lot"""
+        agregats = {}
+        for timestamp, temp, hum, _, _ in rows:
+            heure = timestamp // MS_PAR_HEURE
+            a = agregats.get(heure)
+            if a is None:
+                agregats[heure] = [heure, 1, temp, temp, temp, hum, hum, hum]
+            else:
+                a[1] += 1
+                a[2] += temp
+                a[3] = min(a[3], temp)
+                a[4] = max(a[4], temp)
+                a[5] += hum
+                a[6] = min(a[6], hum)
+                a[7] = max(a[7], hum)
+        return [tuple(a) for a in agregats.values()]
+    
+    @staticmethod
+    def _agreger_elec(rows: List[tuple]) -> List[tuple]:
+        """Agrégats horaires partiels (paramètres de UPSERT_AGREGAT_ELEC_SQL) d'un lot"""
+        agregats = {}
+        for timestamp, v, i, p, e, f, pf, _ in rows:
+            heure = timestamp // MS_PAR_HEURE
+            a = agregats.get(heure)
+            if a is None:
+                agregats[heure] = [heure, 1, v, i, p, p, e, f, pf]
+            else:
+                a[1] += 1
+                a[2] += v
+                a[3] += i
+                a[4] += p
+                a[5] = max(a[5], p)
+                a[6] += e
+                a[7] += f
+                a[8] += pf
+        return [tuple(a) for a in agregats.values()]
     
     def obtenir_mesures_recentes(self, limite: int = 100) -> Dict:
         """Récupère les mesures récentes des deux capteurs"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self.lock:
+            cursor = self.conn.cursor()
             
             # Mesures environnement
             cursor.execute("""
-                SELECT * FROM mesures_environnement 
+                SELECT id, timestamp, temperature_C, humidity_pct, point_rosee, indice_chaleur
+                FROM mesures_environnement 
                 ORDER BY timestamp DESC 
                 LIMIT ?
             """, (limite,))
-            columns_env = [desc[0] for desc in cursor.description]
-            mesures_env = [dict(zip(columns_env, row)) for row in cursor.fetchall()]
+            mesures_env = [dict(r) for r in cursor.fetchall()]
             
             # Mesures électriques
             cursor.execute("""
-                SELECT * FROM mesures_electriques 
+                SELECT id, timestamp, voltage_V, current_A, power_W,
+                       energy_Wh, frequency_Hz, power_factor, alarm
+                FROM mesures_electriques 
                 ORDER BY timestamp DESC 
                 LIMIT ?
             """, (limite,))
-            columns_elec = [desc[0] for desc in cursor.description]
-            mesures_elec = [dict(zip(columns_elec, row)) for row in cursor.fetchall()]
+            mesures_elec = [dict(r) for r in cursor.fetchall()]
             
             return {
                 'environnement': mesures_env,
@@ -180,55 +458,39 @@ class DatabaseManager:
             }
     
     def obtenir_statistiques(self, heures: int = 24) -> Dict:
-        """Calcule les statistiques sur une période"""
-        temps_limite = (datetime.now() - timedelta(hours=heures)).isoformat()
+        """Calcule les statistiques sur les `heures` dernières heures (via les agrégats horaires)"""
+        debut = int((time.time() - heures * 3600) * 1000)
+        params = {'debut': debut, 'heure': debut // MS_PAR_HEURE}
         
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            # Stats environnement
-            cursor.execute("""
-                SELECT 
-                    COUNT(*) as nb_mesures,
-                    AVG(temperature_C) as temp_moy,
-                    MIN(temperature_C) as temp_min,
-                    MAX(temperature_C) as temp_max,
-                    AVG(humidity_pct) as hum_moy,
-                    MIN(humidity_pct) as hum_min,
-                    MAX(humidity_pct) as hum_max
-                FROM mesures_environnement 
-                WHERE timestamp > ?
-            """, (temps_limite,))
-            columns_env = [desc[0] for desc in cursor.description]
-            stats_env = dict(zip(columns_env, cursor.fetchone() or []))
-            
-            # Stats électriques
-            cursor.execute("""
-                SELECT 
-                    COUNT(*) as nb_mesures,
-                    AVG(voltage_V) as tension_moy,
-                    AVG(current_A) as courant_moy,
-                    AVG(power_W) as puissance_moy,
-                    MAX(power_W) as puissance_max,
-                    SUM(energy_Wh) as energie_totale,
-                    AVG(frequency_Hz) as freq_moy,
-                    AVG(power_factor) as fp_moy
-                FROM mesures_electriques 
-                WHERE timestamp > ?
-            """, (temps_limite,))
-            columns_elec = [desc[0] for desc in cursor.description]
-            stats_elec = dict(zip(columns_elec, cursor.fetchone() or []))
-            
-            return {
-                'environnement': stats_env,
-                'electrique': stats_elec
-            }
+        with self.lock:
+            lignes = {r['table_kind']: r for r in
+                      self.conn.execute(STATISTIQUES_SQL, params).fetchall()}
+        
+        stats = {}
+        for kind, colonnes in COLONNES_STATS.items():
+            ligne = lignes.get(kind)
+            if ligne is None:
+                # Aucune mesure sur la période
+                stats[kind] = dict.fromkeys(colonnes)
+                stats[kind]['nb_mesures'] = 0
+            else:
+                stats[kind] = {col: ligne[col] for col in colonnes}
+        
+        return {
+            'environnement': stats['env'],
+            'electrique': stats['elec']
+        }
 
 
 # ============================================================================
 # CAPTEUR DHT22
 # ============================================================================
 
+# Coefficients de Rothfusz pour l'indice de chaleur (T en °C, RH en %)
+_HI_COEFS = (-8.78469475556, 1.61139411, 2.33854883889, -0.14611605,
+             -0.012308094, -0.0164248277778, 0.002211732, 0.00072546,
+             -3.582e-6)
+
 class DHT22Sensor:
     """Gestion du capteur DHT22 (température + humidité)"""
     
@@ -258,43 +520,73 @@ class DHT22Sensor:
         except Exception as e:
             print(f"❌ Erreur initialisation DHT22: {e}")
             self.dht = None
+        
+        # Lecture en tâche de fond: les reprises du protocole (jusqu'à ~250 ms)
+        # ne bloquent plus le cycle de mesure
+        self.intervalle_lecture = 2  # secondes (cadence max du DHT22)
+        self.age_max_ms = 3 * self.intervalle_lecture * 1000  # au-delà: mesure périmée
+        self._derniere_mesure: Optional[MesureEnvironnement] = None
+        # Mesures pas encore enregistrées (append/popleft atomiques, sans verrou)
+        self._nouvelles_mesures = deque(maxlen=100)
+        self._actif = self.dht is not None
+        if self._actif:
+            Thread(target=self._dht_loop, daemon=True).start()
     
     def calculer_point_rosee(self, temp: float, hum: float) -> float:
         """Calcule le point de rosée (formule Magnus)"""
         try:
             a = 17.27
             b = 237.7
-            alpha = ((a * temp) / (b + temp)) + math.log(hum / 100.0)
+            alpha = ((a * temp) / (b + temp)) + _log(hum * 0.01)
             point_rosee = (b * alpha) / (a - alpha)
             return round(point_rosee, 2)
         except:
             return 0.0
     
     def calculer_indice_chaleur(self, temp: float, hum: float) -> float:
-        """Calcule l'indice de chaleur ressenti"""
+        """Calcule l'indice de chaleur ressenti (valable pour temp >= 27 °C)"""
         try:
-            if temp < 27:
-                return temp
-            
-            T = temp
-            RH = hum
-            
-            HI = -8.78469475556 + \
-                 1.61139411 * T + \
-                 2.33854883889 * RH + \
-                 -0.14611605 * T * RH + \
-                 -0.012308094 * T * T + \
-                 -0.0164248277778 * RH * RH + \
-                 0.002211732 * T * T * RH + \
-                 0.00072546 * T * RH * RH + \
-                 -0.000003582 * T * T * RH * RH
-            
+            C0, C1, C2, C3, C4, C5, C6, C7, C8 = _HI_COEFS
+            T, RH = temp, hum
+            # Forme de Horner du polynôme à neuf termes
+            HI = (C0 + T * (C1 + T * (C4 + RH * C6))
+                  + RH * (C2 + RH * (C5 + T * C7))
+                  + T * RH * (C3 + T * RH * C8))
             return round(HI, 2)
         except:
             return temp
     
+    def _dht_loop(self):
+        """Boucle du thread de lecture: conserve la dernière mesure valide"""
+        while self._actif:
+            mesure = self._lire_capteur()
+            if mesure:
+                self._nouvelles_mesures.append(mesure)
+                self._derniere_mesure = mesure
+            time.sleep(self.intervalle_lecture)
+    
     def lire_mesure(self) -> Optional[MesureEnvironnement]:
-        """Lit une mesure du DHT22"""
+        """Retourne la dernière mesure valide, ou None si elle est périmée"""
+        mesure = self._derniere_mesure
+        if mesure is None or int(time.time() * 1000) - mesure.timestamp > self.age_max_ms:
+            return None
+        return mesure
+    
+    def nouvelles_mesures(self) -> List[MesureEnvironnement]:
+        """Retire et retourne les mesures acquises depuis le dernier appel"""
+        mesures = []
+        while True:
+            try:
+                mesures.append(self._nouvelles_mesures.popleft())
+            except IndexError:
+                return mesures
+    
+    def arreter(self):
+        """Arrête le thread de lecture"""
+        self._actif = False
+    
+    def _lire_capteur(self) -> Optional[MesureEnvironnement]:
+        """Lit une mesure du DHT22 (bloquant)"""
         if not self.dht:
             return None
         
@@ -306,10 +598,14 @@ class DHT22Sensor:
                 return None
             
             point_rosee = self.calculer_point_rosee(temperature, humidite)
-            indice_chaleur = self.calculer_indice_chaleur(temperature, humidite)
+            # En dessous de 27 °C l'indice de chaleur vaut la température
+            if temperature < 27:
+                indice_chaleur = temperature
+            else:
+                indice_chaleur = self.calculer_indice_chaleur(temperature, humidite)
             
             return MesureEnvironnement(
-                timestamp=datetime.now().isoformat(),
+                timestamp=int(time.time() * 1000),
                 temperature_C=round(temperature, 2),
                 humidity_pct=round(humidite, 2),
                 point_rosee=point_rosee,
@@ -380,23 +676,17 @@ class PZEMSensor:
             # Lire 10 registres à partir de l'adresse 0
             data = self.master.execute(self.slave_id, cst.READ_INPUT_REGISTERS, 0, 10)
             
-            # Décoder les données selon le format PZEM-004T
-            voltage = data[0] / 10.0
-            current = (data[1] + (data[2] << 16)) / 1000.0
-            power = (data[3] + (data[4] << 16)) / 10.0
-            energy = data[5] + (data[6] << 16)  # En Wh
-            frequency = data[7] / 10.0
-            power_factor = data[8] / 100.0
-            alarm = data[9]
+            # Décoder les données selon le format PZEM-004T (mots 32 bits poids faible d'abord)
+            v, cL, cH, pL, pH, eL, eH, f, pf, alarm = data
             
             return MesureElectrique(
-                timestamp=datetime.now().isoformat(),
-                voltage_V=round(voltage, 2),
-                current_A=round(current, 3),
-                power_W=round(power, 2),
-                energy_Wh=energy,
-                frequency_Hz=round(frequency, 2),
-                power_factor=round(power_factor, 2),
+                timestamp=int(time.time() * 1000),
+                voltage_V=v * 0.1,
+                current_A=(cL | (cH << 16)) * 0.001,
+                power_W=(pL | (pH << 16)) * 0.1,
+                energy_Wh=eL | (eH << 16),  # En Wh
+                frequency_Hz=f * 0.1,
+                power_factor=pf * 0.01,
                 alarm=alarm
             )
             
@@ -435,12 +725,19 @@ class SystemeSurveillance:
         
         # Configuration
         self.intervalle_mesure = 2  # secondes
+        self.flush_every = 30       # cycles entre deux écritures en base (1 minute)
         self.running = False
+        self._tty = sys.stdout.isatty()  # affichage détaillé seulement en console
+        
+        # Mesures en attente d'écriture groupée
+        self._pending_env: List[tuple] = []
+        self._pending_elec: List[tuple] = []
+        self._cycles_depuis_flush = 0
         
         # Dernières données pour l'interface web
+        # (append et list() sur un deque sont atomiques: pas de verrou)
         self.dernieres_mesures_env = deque(maxlen=100)
         self.dernieres_mesures_elec = deque(maxlen=100)
-        self.lock = Lock()
         
         print("=" * 70)
         print("✅ Système initialisé avec succès\n")
@@ -449,56 +746,85 @@ class SystemeSurveillance:
         """Exécute un cycle de mesure complet"""
         timestamp = datetime.now()
         
-        # 1. Lire DHT22
+        # 1. DHT22: enregistrer chaque nouvelle mesure du thread de lecture une
+        #    seule fois; afficher la dernière tant qu'elle n'est pas périmée
+        for mesure in self.dht22.nouvelles_mesures():
+            self._pending_env.append(mesure.ligne_sql())
+            self.dernieres_mesures_env.append(mesure)
         mesure_env = self.dht22.lire_mesure()
-        if mesure_env:
-            self.db.inserer_mesure_environnement(mesure_env)
-            with self.lock:
-                self.dernieres_mesures_env.append(asdict(mesure_env))
         
         # 2. Lire PZEM-004T
         mesure_elec = self.pzem.lire_mesure()
         if mesure_elec:
-            self.db.inserer_mesure_electrique(mesure_elec)
-            with self.lock:
-                self.dernieres_mesures_elec.append(asdict(mesure_elec))
+            self._pending_elec.append(mesure_elec.ligne_sql())
+            self.dernieres_mesures_elec.append(mesure_elec)
         
-        # 3. Afficher dans le terminal
+        # 3. Écrire en base toutes les `flush_every` mesures
+        self._cycles_depuis_flush += 1
+        if self._cycles_depuis_flush >= self.flush_every:
+            self.flush()
+        
+        # 4. Afficher dans le terminal
         self._afficher_terminal(mesure_env, mesure_elec)
     
+    def flush(self):
+        """Écrit en base les mesures en attente (une transaction)"""
+        self._cycles_depuis_flush = 0
+        if not self._pending_env and not self._pending_elec:
+            return
+        
+        env_rows, self._pending_env = self._pending_env, []
+        elec_rows, self._pending_elec = self._pending_elec, []
+        try:
+            self.db.inserer_batch(env_rows, elec_rows)
+        except sqlite3.Error as e:
+            print(f"❌ Erreur écriture base ({len(env_rows) + len(elec_rows)} mesures perdues): {e}")
+    
     def _afficher_terminal(self, env: Optional[MesureEnvironnement], 
                           elec: Optional[MesureElectrique]):
-        """Affiche les mesures dans le terminal"""
-        heure = datetime.now().strftime('%H:%M:%S')
+        """Affiche les mesures dans le terminal (ignoré sans TTY: systemd, redirection)"""
+        if not self._tty:
+            return
         
-        print(f"\n{'=' * 70}")
-        print(f"📊 [{heure}] MESURES EN TEMPS RÉEL")
-        print(f"{'=' * 70}")
+        heure = datetime.now().strftime('%H:%M:%S')
+        lignes = [
+            f"\n{'=' * 70}",
+            f"📊 [{heure}] MESURES EN TEMPS RÉEL",
+            f"{'=' * 70}",
+        ]
         
         # Environnement (DHT22)
         if env:
-            print(f"\n🌡️  ENVIRONNEMENT (DHT22):")
-            print(f"   ├─ Température      : {env.temperature_C:6.2f} °C")
-            print(f"   ├─ Humidité         : {env.humidity_pct:6.2f} %")
-            print(f"   ├─ Point de rosée   : {env.point_rosee:6.2f} °C")
-            print(f"   └─ Indice chaleur   : {env.indice_chaleur:6.2f} °C")
+            lignes += [
+                f"\n🌡️  ENVIRONNEMENT (DHT22):",
+                f"   ├─ Température      : {env.temperature_C:6.2f} °C",
+                f"   ├─ Humidité         : {env.humidity_pct:6.2f} %",
+                f"   ├─ Point de rosée   : {env.point_rosee:6.2f} °C",
+                f"   └─ Indice chaleur   : {env.indice_chaleur:6.2f} °C",
+            ]
         else:
-            print(f"\n🌡️  ENVIRONNEMENT (DHT22): ❌ Erreur de lecture")
+            lignes.append(f"\n🌡️  ENVIRONNEMENT (DHT22): ❌ Erreur de lecture")
         
         # Électrique (PZEM-004T)
         if elec:
-            print(f"\n⚡ ÉLECTRIQUE (PZEM-004T):")
-            print(f"   ├─ Tension          : {elec.voltage_V:6.2f} V")
-            print(f"   ├─ Courant          : {elec.current_A:6.3f} A")
-            print(f"   ├─ Puissance        : {elec.power_W:6.2f} W")
-            print(f"   ├─ Énergie          : {elec.energy_Wh:6.0f} Wh")
-            print(f"   ├─ Fréquence        : {elec.frequency_Hz:6.2f} Hz")
-            print(f"   ├─ Facteur puissance: {elec.power_factor:6.2f}")
-            print(f"   └─ Alarme           : {elec.alarm}")
+            lignes += [
+                f"\n⚡ ÉLECTRIQUE (PZEM-004T):",
+                f"   ├─ Tension          : {elec.voltage_V:6.2f} V",
+                f"   ├─ Courant          : {elec.current_A:6.3f} A",
+                f"   ├─ Puissance        : {elec.power_W:6.2f} W",
+                f"   ├─ Énergie          : {elec.energy_Wh:6.0f} Wh",
+                f"   ├─ Fréquence        : {elec.frequency_Hz:6.2f} Hz",
+                f"   ├─ Facteur puissance: {elec.power_factor:6.2f}",
+                f"   └─ Alarme           : {elec.alarm}",
+            ]
         else:
-            print(f"\n⚡ ÉLECTRIQUE (PZEM-004T): ❌ Erreur de lecture")
+            lignes.append(f"\n⚡ ÉLECTRIQUE (PZEM-004T): ❌ Erreur de lecture")
+        
+        lignes.append(f"{'=' * 70}\n")
         
-        print(f"{'=' * 70}")
+        # Une seule écriture par cycle au lieu d'un print() par ligne
+        sys.stdout.write("\n".join(lignes))
+        sys.stdout.flush()
     
     def boucle_surveillance(self):
         """Boucle principale de surveillance"""
@@ -507,6 +833,10 @@ class SystemeSurveillance:
         
         self.running = True
         
+        # Arrêt par systemd/reboot: sortir de la boucle pour passer par
+        # arreter() et écrire les mesures encore en attente
+        signal.signal(signal.SIGTERM, self._sur_sigterm)
+        
         try:
             while self.running:
                 self.cycle_mesure()
@@ -517,20 +847,29 @@ class SystemeSurveillance:
         finally:
             self.arreter()
     
+    def _sur_sigterm(self, signum, frame):
+        """Gestionnaire SIGTERM: demande l'arrêt de la boucle de surveillance"""
+        print("\n\n🛑 Arrêt demandé (SIGTERM)...")
+        self.running = False
+    
     def arreter(self):
         """Arrête proprement le système"""
         self.running = False
+        self.dht22.arreter()
+        self.flush()
         print("✅ Système arrêté proprement")
     
     def obtenir_donnees_dashboard(self) -> Dict:
         """Retourne les données pour le dashboard web"""
-        with self.lock:
-            return {
-                'mesures_environnement': list(self.dernieres_mesures_env),
-                'mesures_electriques': list(self.dernieres_mesures_elec),
-                'statistiques': self.db.obtenir_statistiques(heures=24),
-                'timestamp': datetime.now().isoformat()
-            }
+        mesures_env = list(self.dernieres_mesures_env)
+        mesures_elec = list(self.dernieres_mesures_elec)
+        
+        return {
+            'mesures_environnement': [m.vers_dict() for m in mesures_env],
+            'mesures_electriques': [m.vers_dict() for m in mesures_elec],
+            'statistiques': self.db.obtenir_statistiques(heures=24),
+            'timestamp': datetime.now().isoformat()
+        }
 
 
 # ============================================================================
@@ -543,23 +882,51 @@ systeme = None
 # Chemin du fichier HTML
 HTML_DIR = os.path.dirname(os.path.abspath(__file__))
 
+# Dashboard lu une seule fois au démarrage, en version brute et gzip
+try:
+    with open(os.path.join(HTML_DIR, 'dashboard.html'), 'rb') as f:
+        HTML_BYTES = f.read()
+    HTML_GZ = gzip.compress(HTML_BYTES, 9)
+except OSError:
+    HTML_BYTES = HTML_GZ = None
+
 @app.route('/')
 def index():
     """Page principale"""
-    return send_from_directory(HTML_DIR, 'dashboard.html')
+    if HTML_BYTES is None:
+        return send_from_directory(HTML_DIR, 'dashboard.html')
+    entetes = {'Cache-Control': 'public, max-age=300', 'Vary': 'Accept-Encoding'}
+    if 'gzip' in request.headers.get('Accept-Encoding', ''):
+        entetes['Content-Encoding'] = 'gzip'
+        return Response(HTML_GZ, mimetype='text/html', headers=entetes)
+    return Response(HTML_BYTES, mimetype='text/html', headers=entetes)
+
+# Cache des réponses JSON: nom d'endpoint -> (expiration monotonic, corps encodé)
+CACHE_TTL = 1.0  # secondes (les mesures arrivent toutes les 2 s)
+_cache_reponses: Dict[str, tuple] = {}
+
+def reponse_json_cachee(cle: str, calculer) -> Response:
+    """Sert le JSON pré-encodé tant qu'il est frais, sinon le recalcule"""
+    maintenant = time.monotonic()
+    entree = _cache_reponses.get(cle)
+    if entree is None or maintenant >= entree[0]:
+        corps = json.dumps(calculer()).encode('utf-8')
+        entree = (maintenant + CACHE_TTL, corps)
+        _cache_reponses[cle] = entree
+    return Response(entree[1], mimetype='application/json')
 
 @app.route('/api/donnees')
 def api_donnees():
     """API: Données en temps réel"""
     if systeme:
-        return jsonify(systeme.obtenir_donnees_dashboard())
+        return reponse_json_cachee('donnees', systeme.obtenir_donnees_dashboard)
     return jsonify({'error': 'Système non initialisé'}), 503
 
 @app.route('/api/statistiques')
 def api_statistiques():
     """API: Statistiques"""
     if systeme:
-        return jsonify({
+        return reponse_json_cachee('statistiques', lambda: {
             'stats_24h': systeme.db.obtenir_statistiques(heures=24),
             'stats_7j': systeme.db.obtenir_statistiques(heures=24*7)
         })
@@ -567,10 +934,14 @@ def api_statistiques():
 
 
 def demarrer_serveur_web(port=5000):
-    """Démarre le serveur web Flask"""
+    """Démarre le serveur web (waitress si disponible, sinon Flask)"""
     print(f"\n🌐 Serveur web démarré sur http://0.0.0.0:{port}")
     print(f"   Accédez au dashboard: http://localhost:{port}")
-    app.run(host='0.0.0.0', port=port, debug=False, use_reloader=False)
+    if WAITRESS_DISPONIBLE:
+        serve(app, host='0.0.0.0', port=port, threads=4, connection_limit=100)
+    else:
+        app.run(host='0.0.0.0', port=port, debug=False, use_reloader=False,
+                threaded=True)
 
 
 # ============================================================================
@@ -0,0 +1,51 @@
+import os
+import sys
+import types
+
+# Les scripts du projet sont à la racine du dépôt
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# ============================================================================
+# SUBSTITUTS DES BIBLIOTHÈQUES MATÉRIELLES
+# ============================================================================
+# Les tests portent sur DatabaseManager (SQLite seul). Les modules capteurs
+# sont remplacés sans condition: sur un hôte autre qu'un Raspberry Pi, le
+# `board` d'adafruit-blinka lève NotImplementedError à l'import.
+
+def _module(nom: str, **attributs) -> types.ModuleType:
+    module = types.ModuleType(nom)
+    module.__dict__.update(attributs)
+    sys.modules[nom] = module
+    return module
+
+
+class _Materiel:
+    """Périphérique absent: toute utilisation échoue comme un capteur débranché"""
+
+    def __init__(self, *args, **kwargs):
+        raise RuntimeError("matériel non disponible pendant les tests")
+
+
+_module('board', **{f'D{n}': n for n in (4, 17, 22, 23, 24, 27)})
+_module('adafruit_dht', DHT22=_Materiel)
+_module('serial', Serial=_Materiel)
+_modbus_tk = _module('modbus_tk')
+_modbus_tk.defines = _module('modbus_tk.defines', READ_INPUT_REGISTERS=4)
+_modbus_tk.modbus_rtu = _module('modbus_tk.modbus_rtu', RtuMaster=_Materiel)
+
+
+# Flask n'est remplacé que s'il n'est pas installé: seules les définitions
+# de routes exécutées à l'import du module sont nécessaires
+try:
+    import flask  # noqa: F401
+except ImportError:
+    class _Flask:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def route(self, *args, **kwargs):
+            return lambda fonction: fonction
+
+    _module('flask', Flask=_Flask, Response=object, jsonify=dict,
+            request=None, send_from_directory=None)
@@ -0,0 +1,72 @@
+"""
+Bornes de la fenêtre de DatabaseManager.obtenir_statistiques
+(agrégats horaires + heure partielle lue dans les tables brutes)
+"""
+
+import pytest
+
+import surveillance_dht22_pzem_fixed as surveillance
+from surveillance_dht22_pzem_fixed import (
+    DatabaseManager, MesureElectrique, MesureEnvironnement, MS_PAR_HEURE,
+)
+
+# Instant fixe choisi pour que le début de la fenêtre 24h tombe en milieu d'heure
+MAINTENANT_MS = 1_800_000_000_000 + 30 * 60 * 1000
+DEBUT_24H_MS = MAINTENANT_MS - 24 * MS_PAR_HEURE
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(surveillance.time, 'time', lambda: MAINTENANT_MS / 1000)
+    return DatabaseManager(str(tmp_path / "test.db"))
+
+
+def _env(timestamp: int, temperature: float) -> tuple:
+    return MesureEnvironnement(timestamp, temperature, 50.0, 10.0, temperature).ligne_sql()
+
+
+def _elec(timestamp: int, puissance: float) -> tuple:
+    return MesureElectrique(timestamp, 230.0, 1.0, puissance, 100, 50.0, 0.9, 0).ligne_sql()
+
+
+def test_fenetre_24h_exacte(db):
+    assert DEBUT_24H_MS % MS_PAR_HEURE != 0
+
+    db.inserer_batch(
+        [
+            _env(DEBUT_24H_MS - MS_PAR_HEURE, 1.0),   # heure précédente: exclue
+            _env(DEBUT_24H_MS - 20 * 60 * 1000, 2.0), # même heure, avant le début: exclue
+            _env(DEBUT_24H_MS - 1, 3.0),              # juste avant le début: exclue
+            _env(DEBUT_24H_MS, 10.0),                 # borne incluse
+            _env(DEBUT_24H_MS + 10 * 60 * 1000, 20.0),
+            _env(MAINTENANT_MS - 1000, 30.0),
+        ],
+        [
+            _elec(DEBUT_24H_MS - 1, 999.0),           # exclue
+            _elec(DEBUT_24H_MS + 1, 100.0),
+            _elec(MAINTENANT_MS - 1000, 300.0),
+        ],
+    )
+
+    stats = db.obtenir_statistiques(heures=24)
+
+    env = stats['environnement']
+    assert env['nb_mesures'] == 3
+    assert env['temp_min'] == 10.0
+    assert env['temp_max'] == 30.0
+    assert env['temp_moy'] == pytest.approx(20.0)
+
+    elec = stats['electrique']
+    assert elec['nb_mesures'] == 2
+    assert elec['puissance_max'] == 300.0
+    assert elec['puissance_moy'] == pytest.approx(200.0)
+
+
+def test_fenetre_vide(db):
+    db.inserer_batch([_env(DEBUT_24H_MS - 1, 3.0)], [])
+
+    stats = db.obtenir_statistiques(heures=24)
+
+    assert stats['environnement']['nb_mesures'] == 0
+    assert stats['environnement']['temp_moy'] is None
+    assert stats['electrique']['nb_mesures'] == 0